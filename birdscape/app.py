@@ -4,9 +4,17 @@ from streamlit_folium import folium_static
 from geopy.geocoders import Nominatim
 import pandas as pd
 import numpy as np
-from pydub import AudioSegment
 import os
+import logging
+import threading
+import diskcache
 from pathlib import Path
+from typing import Optional, Tuple
+try:
+    from birdscape.config import CACHE_DIR, CACHE_EXPIRY
+except ImportError:
+    # `streamlit run birdscape/app.py` only puts birdscape/ on sys.path
+    from config import CACHE_DIR, CACHE_EXPIRY
 
 # Set page configuration
 st.set_page_config(
@@ -16,6 +24,137 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Nominatim allows at most one request per second, so results are cached
+# both in memory and on disk (see _geocode).
+GEOCODE_CACHE_PATH = CACHE_DIR / "geocode"
+
+class GeocodeStats:
+    """Geocode cache counters shared by all reruns and sessions."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.memory_misses = 0
+        self.disk_hits = 0
+    
+    def record_lookup(self) -> None:
+        """Count a geocode lookup from the app."""
+        with self._lock:
+            self.lookups += 1
+    
+    def record_memory_miss(self) -> None:
+        """Count a lookup that missed the in-memory cache."""
+        with self._lock:
+            self.memory_misses += 1
+    
+    def record_disk_hit(self) -> None:
+        """Count a lookup served from the on-disk cache."""
+        with self._lock:
+            self.disk_hits += 1
+    
+    def summary(self) -> str:
+        """Describe the hit counts at each cache level."""
+        with self._lock:
+            memory_hits = self.lookups - self.memory_misses
+            network = self.memory_misses - self.disk_hits
+            return (
+                f"lookups={self.lookups}, memory_hits={memory_hits}, "
+                f"disk_hits={self.disk_hits}, network={network}"
+            )
+
+@st.cache_resource
+def get_geocode_stats() -> GeocodeStats:
+    """
+    Get the geocode cache counters shared by all sessions.
+    
+    Returns:
+        GeocodeStats: The shared counters
+    """
+    return GeocodeStats()
+
+@st.cache_resource
+def get_geocode_cache() -> diskcache.Cache:
+    """
+    Get the on-disk geocode cache shared by all sessions.
+    
+    Returns:
+        diskcache.Cache: Cache stored under CACHE_DIR
+    """
+    return diskcache.Cache(str(GEOCODE_CACHE_PATH))
+
+@st.cache_resource
+def get_geolocator() -> Nominatim:
+    """
+    Get the geocoder shared by all sessions.
+    
+    Streamlit shares cached resources across sessions and threads, so any
+    state kept on them must be thread-safe.
+    
+    Returns:
+        Nominatim: The shared geocoder
+    """
+    return Nominatim(user_agent="birdscape")
+
+def normalize_query(query: str) -> str:
+    """Normalize a location query so equivalent inputs share a cache entry."""
+    return " ".join(query.lower().split())
+
+@st.cache_data(ttl=CACHE_EXPIRY, show_spinner=False)
+def _geocode(query: str) -> Optional[Tuple[float, float, str]]:
+    """
+    Geocode a normalized location query.
+    
+    Only runs on an in-memory cache miss. Results are persisted in
+    CACHE_DIR so restarts do not refetch them.
+    
+    Args:
+        query (str): Normalized location query
+        
+    Returns:
+        Optional[Tuple[float, float, str]]: Latitude, longitude and address,
+        or None if the location was not found
+    """
+    stats = get_geocode_stats()
+    stats.record_memory_miss()
+    
+    cache = get_geocode_cache()
+    result = cache.get(query)
+    if result is not None:
+        stats.record_disk_hit()
+        return result
+    
+    location = get_geolocator().geocode(query)
+    if not location:
+        return None
+    
+    result = (location.latitude, location.longitude, location.address)
+    cache.set(query, result, expire=CACHE_EXPIRY)
+    return result
+
+def geocode_location(query: str) -> Optional[Tuple[float, float, str]]:
+    """
+    Geocode a location query, logging cache hit rates.
+    
+    Args:
+        query (str): Location query as entered by the user
+        
+    Returns:
+        Optional[Tuple[float, float, str]]: Latitude, longitude and address,
+        or None if the location was not found
+    """
+    stats = get_geocode_stats()
+    stats.record_lookup()
+    result = _geocode(normalize_query(query))
+    logger.info(f"Geocode cache: {stats.summary()}")
+    return result
+
 def main():
     st.title("🐦 BirdScape")
     st.markdown("""
@@ -43,11 +182,11 @@ def main():
         location_input = st.text_input("Enter a location (city, country):")
         if location_input:
             try:
-                geolocator = Nominatim(user_agent="birdscape")
-                location = geolocator.geocode(location_input)
+                location = geocode_location(location_input)
                 if location:
-                    st.session_state.selected_location = [location.latitude, location.longitude]
-                    st.success(f"Location found: {location.address}")
+                    latitude, longitude, address = location
+                    st.session_state.selected_location = [latitude, longitude]
+                    st.success(f"Location found: {address}")
                 else:
                     st.error("Location not found. Please try again.")
             except Exception as e:
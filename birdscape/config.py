@@ -30,13 +30,21 @@ DEFAULT_MAP_CENTER = [20, 0]  # latitude, longitude
 EBIRD_HOTSPOT_RADIUS = 25  # kilometers
 EBIRD_LOOKBACK_DAYS = 30  # days
 EBIRD_MAX_HOTSPOTS = 10  # maximum number of hotspots to return
+EBIRD_MAX_CONCURRENCY = 5  # maximum in-flight async requests per client
 
 # Audio Settings
 AUDIO_FORMAT = "mp3"
 SAMPLE_RATE = 44100
 CHANNELS = 2  # stereo
+# Decode/encode with pydub (one ffmpeg process per file) instead of PyAV
+LEGACY_AUDIO = os.getenv("BIRDSCAPE_LEGACY_AUDIO", "").lower() in ("1", "true", "yes")
+
+# NatureLM Settings
+# torch.compile makes the first call slow, so it is opt-in
+NATURELM_COMPILE = os.getenv("NATURELM_COMPILE", "").lower() in ("1", "true", "yes")
 
 # Cache Settings
 CACHE_DIR = DATA_DIR / "cache"
 CACHE_DIR.mkdir(exist_ok=True)
 CACHE_EXPIRY = 3600  # 1 hour in seconds
+EBIRD_CACHE_EXPIRY = 86400  # 24 hours in seconds
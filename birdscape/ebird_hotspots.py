@@ -5,11 +5,28 @@
 Script to query nearby hotspots from eBird API and find the most active one.
 """
 
+import io
+import sys
+import asyncio
+import threading
+import weakref
+import aiohttp
+import orjson
 import requests
 import pandas as pd
-from typing import List, Dict, Optional
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import List, Dict, Optional, Union
+from dataclasses import dataclass, asdict, fields
+from urllib.parse import urlsplit
+from birdscape.config import EBIRD_MAX_CONCURRENCY
+
+# pyarrow's CSV reader is multithreaded; fall back to pandas' C parser
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
 
 @dataclass
 class HotspotInfo:
@@ -24,6 +41,21 @@ class HotspotInfo:
     subnational2Code: str
     isHotspot: bool
 
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HotspotInfo":
+        """Build a HotspotInfo from an eBird hotspot info response."""
+        return cls(
+            locId=data['locId'],
+            name=data['name'],
+            latitude=data['latitude'],
+            longitude=data['longitude'],
+            numChecklists=data['numChecklists'],
+            countryCode=data['countryCode'],
+            subnational1Code=data['subnational1Code'],
+            subnational2Code=data['subnational2Code'],
+            isHotspot=data['isHotspot']
+        )
+
 @dataclass
 class SpeciesInfo:
     """Data class to store species information"""
@@ -46,9 +78,138 @@ class EBirdHotspots:
         self.base_url = "https://api.ebird.org/v2/ref/hotspot/geo"
         self.info_url = "https://api.ebird.org/v2/ref/hotspot/info"
         self.species_url = "https://api.ebird.org/v2/product/spplist"
+        self.obs_url = "https://api.ebird.org/v2/data/obs"
         self.headers = {
             "X-eBirdApiToken": api_key
         }
+        
+        # requests.Session is not thread-safe, so each thread gets its own;
+        # the weak set lets close() reach them without keeping dead threads'
+        # sessions alive.
+        self._local = threading.local()
+        self._sessions: "weakref.WeakSet[requests.Session]" = weakref.WeakSet()
+        self._sessions_lock = threading.Lock()
+        
+        # Async requests run on a client-owned event loop so the concurrency
+        # cap and the per-host aiohttp sessions are shared across calls.
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._loop_lock = threading.Lock()
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._pool: Dict[str, aiohttp.ClientSession] = {}
+
+    def __enter__(self) -> "EBirdHotspots":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    @property
+    def session(self) -> requests.Session:
+        """The calling thread's HTTP session, created on first use."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            # Reuse connections across calls; retries back off exponentially
+            # and honor Retry-After on 429/503 responses.
+            retry = Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"],
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64, max_retries=retry)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.headers.update(self.headers)
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.add(session)
+        return session
+
+    def close(self) -> None:
+        """Close the underlying HTTP sessions and stop the event loop."""
+        sessions_lock = getattr(self, "_sessions_lock", None)
+        if sessions_lock is not None:
+            with sessions_lock:
+                for session in list(self._sessions):
+                    session.close()
+                self._sessions.clear()
+            self._local = threading.local()
+        
+        loop_lock = getattr(self, "_loop_lock", None)
+        if loop_lock is None:
+            return
+        with loop_lock:
+            loop = self._loop
+            if loop is None:
+                return
+            if loop.is_running():
+                try:
+                    asyncio.run_coroutine_threadsafe(self._close_pool(), loop).result(timeout=5)
+                except Exception:
+                    pass
+                loop.call_soon_threadsafe(loop.stop)
+                self._loop_thread.join(timeout=5)
+            if not loop.is_running():
+                loop.close()
+            # Everything below was bound to the old loop; a later call starts fresh
+            self._loop = None
+            self._loop_thread = None
+            self._sem = None
+            self._pool.clear()
+
+    def _run(self, coro):
+        """Run a coroutine on the client's event loop and wait for its result."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever,
+                    name="ebird-hotspots-loop",
+                    daemon=True
+                )
+                self._loop_thread.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _get_session(self, url: str) -> aiohttp.ClientSession:
+        """Get the pooled aiohttp session for a URL's host, creating it if needed."""
+        host = urlsplit(url).netloc
+        session = self._pool.get(host)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit_per_host=64)
+            )
+            self._pool[host] = session
+        return session
+
+    async def _close_pool(self) -> None:
+        """Close all pooled aiohttp sessions."""
+        for session in self._pool.values():
+            await session.close()
+        self._pool.clear()
+
+    def _get(self, url: str, params: Optional[Dict] = None) -> requests.Response:
+        """
+        Issue a GET request on the calling thread's session.
+        
+        Args:
+            url (str): Request URL
+            params (dict, optional): Query parameters
+            
+        Returns:
+            requests.Response: The successful response
+        """
+        response = self.session.get(url, params=params)
+        
+        if response.status_code != 200:
+            raise Exception(f"API request failed: {response.status_code}")
+            
+        return response
 
     def get_nearby_hotspots(
         self,
@@ -81,19 +242,12 @@ class EBirdHotspots:
         if back is not None:
             params["back"] = back
             
-        response = requests.get(
-            self.base_url,
-            headers=self.headers,
-            params=params
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"API request failed: {response.status_code}")
+        response = self._get(self.base_url, params=params)
             
         if fmt == "json":
-            return response.json()
+            return orjson.loads(response.content)
         else:
-            return pd.read_csv(pd.StringIO(response.text))
+            return pd.read_csv(io.BytesIO(response.content), engine=CSV_ENGINE)
 
     def get_hotspot_info(self, locId: str) -> HotspotInfo:
         """
@@ -105,27 +259,86 @@ class EBirdHotspots:
         Returns:
             HotspotInfo: Detailed information about the hotspot
         """
-        response = requests.get(
-            f"{self.info_url}/{locId}",
-            headers=self.headers
-        )
+        response = self._get(f"{self.info_url}/{locId}")
+            
+        return HotspotInfo.from_dict(orjson.loads(response.content))
+
+    async def _get_json_async(
+        self,
+        url: str,
+        max_retries: int = 5,
+        backoff_factor: float = 0.5
+    ) -> Dict:
+        """
+        Issue a GET request asynchronously, backing off on 429 responses.
         
-        if response.status_code != 200:
-            raise Exception(f"API request failed: {response.status_code}")
+        At most EBIRD_MAX_CONCURRENCY requests are in flight at once.
+        
+        Args:
+            url (str): Request URL
+            max_retries (int): Number of retries on 429 responses
+            backoff_factor (float): Base delay for exponential backoff in seconds
             
-        data = response.json()
-        return HotspotInfo(
-            locId=data['locId'],
-            name=data['name'],
-            latitude=data['latitude'],
-            longitude=data['longitude'],
-            numChecklists=data['numChecklists'],
-            countryCode=data['countryCode'],
-            subnational1Code=data['subnational1Code'],
-            subnational2Code=data['subnational2Code'],
-            isHotspot=data['isHotspot']
+        Returns:
+            Dict: Decoded JSON response
+        """
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(EBIRD_MAX_CONCURRENCY)
+        session = await self._get_session(url)
+        
+        for attempt in range(max_retries + 1):
+            async with self._sem:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return orjson.loads(await response.read())
+                    if response.status != 429 or attempt == max_retries:
+                        raise Exception(f"API request failed: {response.status}")
+                    retry_after = response.headers.get("Retry-After")
+            
+            try:
+                delay = float(retry_after)
+            except (TypeError, ValueError):
+                delay = backoff_factor * (2 ** attempt)
+            await asyncio.sleep(delay)
+
+    async def _get_hotspot_infos_async(self, locIds: List[str]) -> List[Union[HotspotInfo, Exception]]:
+        """
+        Get detailed information for several hotspots concurrently.
+        
+        Runs on the client's own event loop (see _run), since the semaphore
+        and pooled sessions are bound to it.
+        
+        Args:
+            locIds (List[str]): The location codes for the hotspots
+            
+        Returns:
+            List[Union[HotspotInfo, Exception]]: Hotspot information in the
+            same order as locIds, or the exception raised for that hotspot
+        """
+        async def fetch(locId: str) -> HotspotInfo:
+            data = await self._get_json_async(f"{self.info_url}/{locId}")
+            return HotspotInfo.from_dict(data)
+        
+        return await asyncio.gather(
+            *(fetch(locId) for locId in locIds),
+            return_exceptions=True
         )
 
+    def get_hotspot_infos(self, locIds: List[str]) -> List[Union[HotspotInfo, Exception]]:
+        """
+        Get detailed information for several hotspots concurrently.
+        
+        Safe to call from several threads at once.
+        
+        Args:
+            locIds (List[str]): The location codes for the hotspots
+            
+        Returns:
+            List[Union[HotspotInfo, Exception]]: Hotspot information in the
+            same order as locIds, or the exception raised for that hotspot
+        """
+        return self._run(self._get_hotspot_infos_async(locIds))
+
     def get_hotspot_species(self, locId: str, back: int = 30) -> List[SpeciesInfo]:
         """
         Get species list for a specific hotspot.
@@ -137,44 +350,43 @@ class EBirdHotspots:
         Returns:
             List[SpeciesInfo]: List of species observed at the hotspot
         """
-        # Get current date and date 30 days ago
-        end_date = datetime.now().strftime('%Y/%m/%d')
-        start_date = (datetime.now() - timedelta(days=back)).strftime('%Y/%m/%d')
-        
-        url = f"https://api.ebird.org/v2/data/obs/{locId}/recent"
+        url = f"{self.obs_url}/{locId}/recent"
         params = {
             "back": back,
             "fmt": "json"
         }
         
-        response = requests.get(
-            url,
-            headers=self.headers,
-            params=params
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"API request failed: {response.status_code}")
+        response = self._get(url, params=params)
             
-        observations = response.json()
-        
-        # Create a dictionary to store unique species with their counts
-        species_dict = {}
-        for obs in observations:
-            species_code = obs['speciesCode']
-            if species_code not in species_dict:
-                species_dict[species_code] = SpeciesInfo(
-                    speciesCode=species_code,
-                    comName=obs['comName'],
-                    sciName=obs['sciName'],
-                    category=obs['category'],
-                    taxonOrder=obs['taxonOrder'],
-                    count=1
-                )
-            else:
-                species_dict[species_code].count += 1
-                
-        return list(species_dict.values())
+        observations = orjson.loads(response.content)
+        
+        if not observations:
+            return []
+        
+        # Count observations per species, keeping the first record's details.
+        # Only the needed fields are copied out of the observation dicts, and
+        # only the species codes go through pandas, so the detail values are
+        # returned exactly as received.
+        rows = [
+            (obs['speciesCode'], obs['comName'], obs['sciName'], obs['category'], obs['taxonOrder'])
+            for obs in observations
+        ]
+        codes = pd.Series([row[0] for row in rows], dtype='category')
+        counts = codes.value_counts(sort=False)
+        first_seen = codes.drop_duplicates()
+        
+        species_list = []
+        for index, code in first_seen.items():
+            _, com_name, sci_name, category, taxon_order = rows[index]
+            species_list.append(SpeciesInfo(
+                speciesCode=code,
+                comName=com_name,
+                sciName=sci_name,
+                category=category,
+                taxonOrder=taxon_order,
+                count=int(counts[code])
+            ))
+        return species_list
 
 def main():
     # Example usage
@@ -194,34 +406,49 @@ def main():
         
         # Get detailed info for each hotspot
         hotspot_info_list = []
-        for hotspot in hotspots:
-            try:
-                info = ebird.get_hotspot_info(hotspot['locId'])
+        infos = ebird.get_hotspot_infos([hotspot['locId'] for hotspot in hotspots])
+        for hotspot, info in zip(hotspots, infos):
+            if isinstance(info, Exception):
+                print(f"Error getting info for {hotspot['locName']}: {info}")
+            else:
                 hotspot_info_list.append(info)
                 print(f"Retrieved info for {info.name}")
-            except Exception as e:
-                print(f"Error getting info for {hotspot['locName']}: {e}")
         
         # Find hotspot with most checklists
         if hotspot_info_list:
-            most_active = max(hotspot_info_list, key=lambda x: x.numChecklists)
+            hotspots_df = pd.DataFrame([asdict(info) for info in hotspot_info_list])
+            most_active = hotspots_df.loc[hotspots_df['numChecklists'].idxmax()]
             print("\nMost active hotspot:")
-            print(f"Name: {most_active.name}")
-            print(f"Location ID: {most_active.locId}")
-            print(f"Coordinates: {most_active.latitude}, {most_active.longitude}")
-            print(f"Number of checklists: {most_active.numChecklists}")
-            print(f"Region: {most_active.subnational1Code}, {most_active.countryCode}")
+            print(f"Name: {most_active['name']}")
+            print(f"Location ID: {most_active['locId']}")
+            print(f"Coordinates: {most_active['latitude']}, {most_active['longitude']}")
+            print(f"Number of checklists: {most_active['numChecklists']}")
+            print(f"Region: {most_active['subnational1Code']}, {most_active['countryCode']}")
             
             # Get species list for the most active hotspot
             print("\nSpecies observed in the last 30 days:")
-            species_list = ebird.get_hotspot_species(most_active.locId)
-            species_list.sort(key=lambda x: x.count, reverse=True)
-            
-            print("\nSpecies (sorted by frequency):")
-            print(f"{'Common Name':<30} {'Scientific Name':<30} {'Count':<10}")
-            print("-" * 72)
-            for species in species_list:
-                print(f"{species.comName:<30} {species.sciName:<30} {species.count:<10}")
+            species_list = ebird.get_hotspot_species(most_active['locId'])
+            species_df = pd.DataFrame(
+                [asdict(species) for species in species_list],
+                columns=[field.name for field in fields(SpeciesInfo)]
+            ).sort_values('count', ascending=False, kind='stable')
+            
+            # Size the name columns to fit the longest entry and emit the
+            # whole table in a single write
+            com_width = max([len('Common Name'), *species_df['comName'].str.len()])
+            sci_width = max([len('Scientific Name'), *species_df['sciName'].str.len()])
+            lines = [
+                "\nSpecies (sorted by frequency):",
+                f"{'Common Name':<{com_width}} {'Scientific Name':<{sci_width}} {'Count':<10}",
+                "-" * (com_width + sci_width + 12)
+            ]
+            lines.extend(
+                f"{com_name:<{com_width}} {sci_name:<{sci_width}} {count:<10}"
+                for com_name, sci_name, count in zip(
+                    species_df['comName'], species_df['sciName'], species_df['count']
+                )
+            )
+            sys.stdout.write("\n".join(lines) + "\n")
         else:
             print("No hotspot information was retrieved.")
             
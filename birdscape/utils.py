@@ -1,18 +1,33 @@
 import os
+import hashlib
+import tempfile
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import requests
 from typing import List, Tuple, Optional, Union
 import logging
 import numpy as np
+import torch
+import diskcache
 from datetime import datetime, timedelta
 from NatureLM.models import NatureLM
 from NatureLM.infer import Pipeline
+import av
 from .ebird_hotspots import EBirdHotspots, HotspotInfo, SpeciesInfo
 from .config import (
     EBIRD_API_KEY,
     EBIRD_HOTSPOT_RADIUS,
     EBIRD_LOOKBACK_DAYS,
-    EBIRD_MAX_HOTSPOTS
+    EBIRD_MAX_HOTSPOTS,
+    AUDIO_FORMAT,
+    SAMPLE_RATE,
+    CHANNELS,
+    LEGACY_AUDIO,
+    NATURELM_COMPILE,
+    CACHE_DIR,
+    EBIRD_CACHE_EXPIRY,
+    OUTPUT_DIR
 )
 
 # Configure logging
@@ -22,12 +37,161 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Initialize eBird client
-try:
-    ebird_client = EBirdHotspots(EBIRD_API_KEY)
-except Exception as e:
-    logger.error(f"Failed to initialize eBird client: {str(e)}")
-    ebird_client = None
+@functools.lru_cache(maxsize=1)
+def get_ebird_client() -> EBirdHotspots:
+    """
+    Get the shared eBird client, creating it on first use.
+    
+    The client is shared across Streamlit sessions and threads; it keeps
+    one requests.Session per thread, so its methods are safe to call
+    concurrently.
+    
+    Returns:
+        EBirdHotspots: The shared eBird client
+    """
+    try:
+        return EBirdHotspots(EBIRD_API_KEY)
+    except Exception as e:
+        logger.error(f"Failed to initialize eBird client: {str(e)}")
+        raise RuntimeError(f"eBird client not initialized: {str(e)}")
+
+# Encoder used by PyAV for each output format
+AUDIO_CODECS = {
+    "mp3": "libmp3lame",
+    "wav": "pcm_s16le",
+    "flac": "flac",
+    "ogg": "libvorbis"
+}
+
+def _channel_layout(channels: int) -> str:
+    """Get the FFmpeg channel layout name for a channel count."""
+    return "mono" if channels == 1 else "stereo"
+
+@functools.lru_cache(maxsize=1)
+def get_ebird_cache() -> diskcache.FanoutCache:
+    """
+    Get the shared on-disk cache for eBird results.
+    
+    Returns:
+        diskcache.FanoutCache: Cache stored under CACHE_DIR
+    """
+    return diskcache.FanoutCache(str(CACHE_DIR / "ebird"))
+
+def load_audio(path: Union[str, Path]) -> np.ndarray:
+    """
+    Load an audio file as int16 samples at SAMPLE_RATE with CHANNELS channels.
+    
+    Decoding runs in-process through PyAV unless LEGACY_AUDIO is set.
+    
+    Args:
+        path (Union[str, Path]): Path to the audio file
+        
+    Returns:
+        np.ndarray: Samples shaped (n, CHANNELS)
+    """
+    if LEGACY_AUDIO:
+        from pydub import AudioSegment
+        segment = (
+            AudioSegment.from_file(str(path))
+            .set_frame_rate(SAMPLE_RATE)
+            .set_channels(CHANNELS)
+            .set_sample_width(2)
+        )
+        return np.frombuffer(segment.raw_data, dtype=np.int16).reshape(-1, CHANNELS)
+    
+    resampler = av.AudioResampler(
+        format="s16",
+        layout=_channel_layout(CHANNELS),
+        rate=SAMPLE_RATE
+    )
+    chunks = []
+    with av.open(str(path)) as container:
+        for frame in container.decode(audio=0):
+            chunks.extend(f.to_ndarray() for f in resampler.resample(frame))
+        chunks.extend(f.to_ndarray() for f in resampler.resample(None))
+    
+    if not chunks:
+        return np.zeros((0, CHANNELS), dtype=np.int16)
+    # Packed s16 frames come back as interleaved (1, n * CHANNELS) arrays
+    return np.concatenate(chunks, axis=1).reshape(-1, CHANNELS)
+
+def save_audio(audio: np.ndarray, output_path: Union[str, Path]) -> None:
+    """
+    Save a waveform to an audio file.
+    
+    Encoding runs in-process through PyAV unless LEGACY_AUDIO is set.
+    
+    Args:
+        audio (np.ndarray): Samples shaped (n,) or (n, channels); float
+            samples are expected in [-1, 1]
+        output_path (Union[str, Path]): Path to write the audio file to
+    """
+    samples = np.asarray(audio)
+    if np.issubdtype(samples.dtype, np.floating):
+        samples = np.clip(samples, -1.0, 1.0) * 32767
+    samples = samples.astype(np.int16)
+    if samples.ndim == 1:
+        samples = samples[:, np.newaxis]
+    channels = samples.shape[1]
+    
+    if LEGACY_AUDIO:
+        from pydub import AudioSegment
+        segment = AudioSegment(
+            samples.tobytes(),
+            frame_rate=SAMPLE_RATE,
+            sample_width=2,
+            channels=channels
+        )
+        segment.export(str(output_path), format=AUDIO_FORMAT)
+        return
+    
+    layout = _channel_layout(channels)
+    codec = AUDIO_CODECS.get(Path(output_path).suffix.lstrip("."), AUDIO_CODECS[AUDIO_FORMAT])
+    with av.open(str(output_path), "w") as container:
+        stream = container.add_stream(codec, rate=SAMPLE_RATE, layout=layout)
+        frame = av.AudioFrame.from_ndarray(
+            np.ascontiguousarray(samples).reshape(1, -1),
+            format="s16",
+            layout=layout
+        )
+        frame.sample_rate = SAMPLE_RATE
+        for packet in stream.encode(frame):
+            container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+def mix_clips(
+    clips: List[np.ndarray],
+    duration: float,
+    rng: Optional[np.random.Generator] = None
+) -> np.ndarray:
+    """
+    Overlay clips at random offsets into a single track.
+    
+    Clips longer than the track are truncated. The mix is scaled down if
+    overlapping clips would otherwise clip.
+    
+    Args:
+        clips (List[np.ndarray]): int16 samples shaped (n, CHANNELS)
+        duration (float): Length of the mixed track in seconds
+        rng (np.random.Generator, optional): Source of clip offsets
+        
+    Returns:
+        np.ndarray: int16 samples shaped (duration * SAMPLE_RATE, CHANNELS)
+    """
+    rng = rng or np.random.default_rng()
+    total = int(duration * SAMPLE_RATE)
+    mix = np.zeros((total, CHANNELS), dtype=np.float32)
+    
+    for clip in clips:
+        clip = clip[:total]
+        offset = rng.integers(0, total - len(clip) + 1)
+        mix[offset:offset + len(clip)] += clip
+    
+    peak = np.abs(mix).max() if total else 0.0
+    if peak > 32767:
+        mix *= 32767 / peak
+    return np.clip(mix, -32768, 32767).astype(np.int16)
 
 class NatureLMManager:
     """Manager class for NatureLM model and pipeline operations."""
@@ -50,13 +214,32 @@ class NatureLMManager:
         """Initialize the NatureLM model and pipeline."""
         try:
             self.model = NatureLM.from_pretrained(self.model_path)
-            self.model = self.model.eval().to(self.device)
+            self.model = self.model.eval().to(self.device, dtype=self._dtype())
+            if NATURELM_COMPILE:
+                self.model = torch.compile(self.model, mode="reduce-overhead")
             self.pipeline = Pipeline(model=self.model)
             logger.info("NatureLM model initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize NatureLM model: {str(e)}")
             raise RuntimeError(f"Failed to initialize NatureLM model: {str(e)}")
     
+    def _dtype(self) -> torch.dtype:
+        """Get the weight dtype: BF16 where supported, FP16 on older GPUs, FP32 on CPU."""
+        if not self.device.startswith("cuda"):
+            return torch.float32
+        return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    
+    def _run_pipeline(self, *args, **kwargs) -> List:
+        """Run the pipeline without autograd, autocasting to the model dtype."""
+        device_type = "cuda" if self.device.startswith("cuda") else "cpu"
+        dtype = self._dtype()
+        with torch.inference_mode(), torch.autocast(
+            device_type=device_type,
+            dtype=dtype,
+            enabled=dtype != torch.float32
+        ):
+            return self.pipeline(*args, **kwargs)
+    
     def process_audio(
         self,
         audio_paths: Union[str, List[str], np.ndarray, List[np.ndarray]],
@@ -80,7 +263,7 @@ class NatureLMManager:
             raise RuntimeError("NatureLM pipeline not initialized")
         
         try:
-            results = self.pipeline(
+            results = self._run_pipeline(
                 audio_paths,
                 queries,
                 window_length_seconds=window_length_seconds,
@@ -91,6 +274,75 @@ class NatureLMManager:
             logger.error(f"Failed to process audio: {str(e)}")
             raise RuntimeError(f"Failed to process audio: {str(e)}")
     
+    def generate_bird_sounds_batch(
+        self,
+        species_names: List[str],
+        duration_seconds: float = 10.0,
+        output_paths: Optional[List[str]] = None
+    ) -> List[Optional[str]]:
+        """
+        Generate bird sounds for several species in a single pipeline call.
+        
+        Args:
+            species_names: Names of the bird species
+            duration_seconds: Duration of each generated sound in seconds
+            output_paths: Optional paths to save the generated audio, one per species
+            
+        Returns:
+            List[Optional[str]]: Path to each generated audio file (or the raw
+            result if no output paths are given), None where generation failed
+        """
+        if not self.pipeline:
+            raise RuntimeError("NatureLM pipeline not initialized")
+        
+        if not species_names:
+            return []
+        
+        try:
+            queries = [f"Generate a {name} bird call" for name in species_names]
+            results = self._run_pipeline(
+                species_names,
+                queries,
+                window_length_seconds=duration_seconds,
+                hop_length_seconds=duration_seconds
+            )
+        except Exception as e:
+            logger.error(f"Failed to generate sounds for {', '.join(species_names)}: {str(e)}")
+            return [None] * len(species_names)
+        
+        if not output_paths:
+            return list(results)
+        
+        for directory in {Path(path).parent for path in output_paths}:
+            directory.mkdir(parents=True, exist_ok=True)
+        
+        # Encoding is I/O bound, so write the files in parallel
+        with ThreadPoolExecutor() as executor:
+            return list(executor.map(self._save_result, species_names, results, output_paths))
+    
+    def _save_result(self, species_name: str, result: np.ndarray, output_path: str) -> Optional[str]:
+        """Save one generated sound, returning its path or None on failure."""
+        # Encode to a temporary file next to the target and move it into place,
+        # so a failed or concurrent write never leaves a partial file that the
+        # sound cache would treat as complete
+        output_path = Path(output_path)
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=output_path.parent,
+                prefix=f".{output_path.stem}-",
+                suffix=output_path.suffix
+            )
+            os.close(fd)
+            save_audio(result, tmp_path)
+            os.replace(tmp_path, output_path)
+            return str(output_path)
+        except Exception as e:
+            logger.error(f"Failed to save sound for {species_name}: {str(e)}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return None
+    
     def generate_bird_sound(
         self,
         species_name: str,
@@ -108,36 +360,73 @@ class NatureLMManager:
         Returns:
             Optional[str]: Path to the generated audio file if successful
         """
-        if not self.pipeline:
-            raise RuntimeError("NatureLM pipeline not initialized")
+        results = self.generate_bird_sounds_batch(
+            [species_name],
+            duration_seconds=duration_seconds,
+            output_paths=[output_path] if output_path else None
+        )
+        return results[0] if results else None
+
+@functools.lru_cache(maxsize=1)
+def get_naturelm() -> NatureLMManager:
+    """
+    Get the shared NatureLM manager, loading the model on first use.
+    
+    Failures are not cached, so a later call retries the model load. The
+    manager is shared across Streamlit sessions and threads and keeps no
+    mutable state after initialization.
+    
+    Returns:
+        NatureLMManager: The shared NatureLM manager
+    """
+    return NatureLMManager()
+
+def sound_cache_path(species_name: str, duration: float) -> Path:
+    """
+    Get the content-addressed cache path for a generated bird sound.
+    
+    Args:
+        species_name (str): Name of the bird species
+        duration (float): Duration of the sound in seconds
         
-        try:
-            query = f"Generate a {species_name} bird call"
-            results = self.pipeline(
-                [species_name],
-                [query],
-                window_length_seconds=duration_seconds,
-                hop_length_seconds=duration_seconds
-            )
-            
-            if results and output_path:
-                output_path = Path(output_path)
-                output_path.parent.mkdir(exist_ok=True)
-                # TODO: Save the generated audio to output_path
-                return str(output_path)
-            
-            return results[0] if results else None
-            
-        except Exception as e:
-            logger.error(f"Failed to generate sound for {species_name}: {str(e)}")
-            return None
+    Returns:
+        Path: Location of the cached audio file
+    """
+    key = hashlib.sha1(f"{species_name}:{float(duration)}".encode()).hexdigest()[:16]
+    return CACHE_DIR / f"{key}.{AUDIO_FORMAT}"
 
-# Initialize global NatureLM manager
-try:
-    naturelm_manager = NatureLMManager()
-except Exception as e:
-    logger.error(f"Failed to initialize global NatureLM manager: {str(e)}")
-    naturelm_manager = None
+def generate_bird_sounds_cached(species_names: List[str], duration: float) -> List[Optional[str]]:
+    """
+    Generate bird sounds, reusing any previously generated for the same duration.
+    
+    Generation for a (species, duration) pair is deterministic, so sounds are
+    cached on disk and only missing species are sent to NatureLM.
+    
+    Args:
+        species_names (List[str]): Names of the bird species
+        duration (float): Duration of each sound in seconds
+        
+    Returns:
+        List[Optional[str]]: Path to each audio file, None where generation failed
+    """
+    CACHE_DIR.mkdir(exist_ok=True)
+    existing = {entry.name for entry in os.scandir(CACHE_DIR)}
+    paths = {name: sound_cache_path(name, duration) for name in species_names}
+    todo = [name for name, path in paths.items() if path.name not in existing]
+    
+    generated = {}
+    if todo:
+        results = get_naturelm().generate_bird_sounds_batch(
+            todo,
+            duration_seconds=duration,
+            output_paths=[str(paths[name]) for name in todo]
+        )
+        generated = dict(zip(todo, results))
+    
+    return [
+        generated[name] if name in generated else str(paths[name])
+        for name in species_names
+    ]
 
 def get_bird_species(latitude: float, longitude: float) -> List[dict]:
     """
@@ -150,31 +439,59 @@ def get_bird_species(latitude: float, longitude: float) -> List[dict]:
     Returns:
         List[dict]: List of bird species with their information
     """
-    if not ebird_client:
-        raise RuntimeError("eBird client not initialized")
+    # Results are cached on a ~11 m grid
+    cache = get_ebird_cache()
+    species_key = f"spp:{round(latitude, 4)}:{round(longitude, 4)}"
+    cached = cache.get(species_key)
+    if cached is not None:
+        return cached
+    
+    ebird_client = get_ebird_client()
     
     try:
-        # Get nearby hotspots
-        hotspots = ebird_client.get_nearby_hotspots(
-            lat=latitude,
-            lng=longitude,
-            dist=EBIRD_HOTSPOT_RADIUS,
-            back=EBIRD_LOOKBACK_DAYS
-        )
+        # Get nearby hotspots; eBird only uses coordinates to 2 decimal places
+        lat, lng = round(latitude, 2), round(longitude, 2)
+        hotspots_key = f"hs:{lat}:{lng}:{EBIRD_HOTSPOT_RADIUS}"
+        hotspots = cache.get(hotspots_key)
+        if hotspots is None:
+            hotspots = ebird_client.get_nearby_hotspots(
+                lat=lat,
+                lng=lng,
+                dist=EBIRD_HOTSPOT_RADIUS,
+                back=EBIRD_LOOKBACK_DAYS
+            )
+            cache.set(hotspots_key, hotspots, expire=EBIRD_CACHE_EXPIRY)
         
         if not hotspots:
             logger.warning(f"No hotspots found near {latitude}, {longitude}")
             return []
         
-        # Get species list for the most active hotspot
-        most_active = max(hotspots, key=lambda x: x.numChecklists)
+        # Fetch hotspot details concurrently, then use the most active one
+        infos = ebird_client.get_hotspot_infos(
+            [hotspot['locId'] for hotspot in hotspots[:EBIRD_MAX_HOTSPOTS]]
+        )
+        hotspot_infos = [info for info in infos if isinstance(info, HotspotInfo)]
+        if not hotspot_infos:
+            logger.warning(f"No hotspot information retrieved near {latitude}, {longitude}")
+            return []
+        
+        # Pick the most active hotspot with valid coordinates
+        latitudes = np.array([info.latitude for info in hotspot_infos], dtype=float)
+        longitudes = np.array([info.longitude for info in hotspot_infos], dtype=float)
+        num_checklists = np.array([info.numChecklists for info in hotspot_infos], dtype=float)
+        valid = validate_locations(latitudes, longitudes)
+        if not valid.any():
+            logger.warning(f"No hotspots with valid coordinates near {latitude}, {longitude}")
+            return []
+        num_checklists[~valid] = -np.inf
+        most_active = hotspot_infos[int(np.argmax(num_checklists))]
         species_list = ebird_client.get_hotspot_species(
             most_active.locId,
             back=EBIRD_LOOKBACK_DAYS
         )
         
         # Convert to list of dictionaries
-        return [
+        bird_species = [
             {
                 "name": species.comName,
                 "scientific_name": species.sciName,
@@ -182,6 +499,8 @@ def get_bird_species(latitude: float, longitude: float) -> List[dict]:
             }
             for species in species_list
         ]
+        cache.set(species_key, bird_species, expire=EBIRD_CACHE_EXPIRY)
+        return bird_species
         
     except Exception as e:
         logger.error(f"Failed to get bird species: {str(e)}")
@@ -198,28 +517,23 @@ def create_soundscape(bird_species: List[dict], duration: int = 60) -> str:
     Returns:
         str: Path to the generated audio file
     """
-    if not naturelm_manager:
-        raise RuntimeError("NatureLM manager not initialized")
+    # Generate bird sounds for all species in one batch
+    species_names = [species['name'] for species in bird_species]
+    sound_paths = generate_bird_sounds_cached(species_names, duration)
+    sound_files = [path for path in sound_paths if path]
     
-    # Generate bird sounds for each species
-    sound_files = []
-    for species in bird_species:
+    # Combine sounds into a soundscape
+    clips = []
+    for path in sound_files:
         try:
-            sound_path = naturelm_manager.generate_bird_sound(
-                species['name'],
-                duration_seconds=duration,
-                output_path=f"output/{species['name'].replace(' ', '_')}.mp3"
-            )
-            if sound_path:
-                sound_files.append(sound_path)
+            clips.append(load_audio(path))
         except Exception as e:
-            logger.error(f"Failed to generate sound for {species['name']}: {str(e)}")
+            logger.error(f"Failed to load sound {path}: {str(e)}")
     
-    # Combine sounds into a soundscape
-    output_path = Path("output") / "soundscape.mp3"
+    output_path = OUTPUT_DIR / f"soundscape.{AUDIO_FORMAT}"
     output_path.parent.mkdir(exist_ok=True)
+    save_audio(mix_clips(clips, duration), output_path)
     
-    # TODO: Implement sound mixing logic
     return str(output_path)
 
 def validate_location(latitude: float, longitude: float) -> bool:
@@ -235,6 +549,21 @@ def validate_location(latitude: float, longitude: float) -> bool:
     """
     return -90 <= latitude <= 90 and -180 <= longitude <= 180
 
+def validate_locations(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Vectorized version of validate_location for arrays of coordinates.
+    
+    Args:
+        latitudes (np.ndarray): Latitude coordinates
+        longitudes (np.ndarray): Longitude coordinates
+        
+    Returns:
+        np.ndarray: Boolean mask, True where the coordinates are valid
+    """
+    latitudes = np.asarray(latitudes)
+    longitudes = np.asarray(longitudes)
+    return (latitudes >= -90) & (latitudes <= 90) & (longitudes >= -180) & (longitudes <= 180)
+
 def download_bird_sound(species_name: str) -> Optional[str]:
     """
     Download bird sound for a given species using NatureLM-audio.
@@ -245,11 +574,4 @@ def download_bird_sound(species_name: str) -> Optional[str]:
     Returns:
         Optional[str]: Path to the downloaded audio file if successful, None otherwise
     """
-    if not naturelm_manager:
-        raise RuntimeError("NatureLM manager not initialized")
-    
-    return naturelm_manager.generate_bird_sound(
-        species_name,
-        duration_seconds=10.0,
-        output_path=f"output/{species_name.replace(' ', '_')}.mp3"
-    )
+    return generate_bird_sounds_cached([species_name], duration=10.0)[0]
@@ -0,0 +1,74 @@
+import orjson
+import pytest
+
+from birdscape.ebird_hotspots import EBirdHotspots, SpeciesInfo
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.status_code = 200
+        self.content = orjson.dumps(data)
+
+
+def observation(code, com_name, sci_name, category="species", taxon_order=1):
+    return {
+        "speciesCode": code,
+        "comName": com_name,
+        "sciName": sci_name,
+        "category": category,
+        "taxonOrder": taxon_order,
+        "locId": "L123",
+        "howMany": 2,
+    }
+
+
+def count_species_loop(observations):
+    """Reference implementation: the original per-observation loop."""
+    species_dict = {}
+    for obs in observations:
+        species_code = obs['speciesCode']
+        if species_code not in species_dict:
+            species_dict[species_code] = SpeciesInfo(
+                speciesCode=species_code,
+                comName=obs['comName'],
+                sciName=obs['sciName'],
+                category=obs['category'],
+                taxonOrder=obs['taxonOrder'],
+                count=1
+            )
+        else:
+            species_dict[species_code].count += 1
+    return list(species_dict.values())
+
+
+@pytest.fixture
+def client():
+    ebird = EBirdHotspots("test-key")
+    yield ebird
+    ebird.close()
+
+
+def test_get_hotspot_species_matches_loop(client, monkeypatch):
+    observations = [
+        observation("amerob", "American Robin", None, taxon_order=30),
+        observation("houspa", "House Sparrow", "Passer domesticus", taxon_order=50),
+        observation("amerob", "American Robin", "Turdus migratorius", taxon_order=30),
+        observation("bkcchi", "Black-capped Chickadee", "Poecile atricapillus", taxon_order=20.5),
+        observation("houspa", "House Sparrow", "Passer domesticus", taxon_order=50),
+        observation("amerob", "American Robin", "Turdus migratorius", taxon_order=30),
+    ]
+    monkeypatch.setattr(client, "_get", lambda url, params=None: FakeResponse(observations))
+
+    species = client.get_hotspot_species("L123")
+
+    assert species == count_species_loop(observations)
+    assert [s.speciesCode for s in species] == ["amerob", "houspa", "bkcchi"]
+    assert species[0].sciName is None
+    assert species[2].taxonOrder == 20.5
+    assert [s.count for s in species] == [3, 2, 1]
+
+
+def test_get_hotspot_species_empty(client, monkeypatch):
+    monkeypatch.setattr(client, "_get", lambda url, params=None: FakeResponse([]))
+
+    assert client.get_hotspot_species("L123") == []